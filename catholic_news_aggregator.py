@@ -4,11 +4,16 @@ ReadyCatholic News Aggregator
 Fetches headlines from a comprehensive list of Catholic news sources.
 """
 
+import asyncio
+import aiohttp
 import feedparser
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from html import escape
+import json
 import os
+import re
 
 # Comprehensive Catholic news RSS feeds
 CATHOLIC_NEWS_SOURCES = {
@@ -35,6 +40,187 @@ CATHOLIC_NEWS_SOURCES = {
     'Zenit': 'https://zenit.org/feed/',
 }
 
+# The first story from these sources goes to TOP STORIES
+BREAKING_SOURCES = frozenset({'Vatican News', 'The Pillar', 'OSV News'})
+
+# Default section for sources with a clear focus
+SOURCE_CATEGORY = {
+    'Vatican News': 'vatican',
+    'National Catholic Register': 'america',
+    'OSV News': 'america',
+    'The Pillar': 'america',
+    'Catholic Daily Reflections': 'faith',
+    'Catholic Stand': 'faith',
+    'Spirit Daily': 'faith',
+    'LifeSiteNews': 'culture',
+    'TFP.org': 'culture',
+    'ChurchPOP': 'culture',
+    'Crux': 'world',
+    'Zenit': 'world',
+    'The Catholic Herald': 'world',
+    'Catholic Education': 'education',
+}
+
+# Title keyword patterns for each section, matched as whole words with
+# their common inflections listed explicitly ("life" must not hit "lifestyle").
+# "US" is case-sensitive so the pronoun "us" doesn't count; in all-caps
+# titles the two can't be told apart, so _classify ignores it there.
+KEYWORD_PATTERNS = {
+    'vatican': r'popes?|vatican',
+    'america': r'(?-i:US)|u\.s\.|americans?|america',
+    'faith': r'faith(?:ful)?',
+    'culture': r'life|abortion|famil(?:y|ies)|cultur(?:e|al)',
+    'world': r'world(?:wide)?',
+    'education': r'schools?|education(?:al)?',
+}
+KEYWORD_RE = re.compile(
+    r'\b(?:' + '|'.join(f'(?P<{category}>{pattern})' for category, pattern in KEYWORD_PATTERNS.items()) + r')(?!\w)',
+    re.IGNORECASE,
+)
+
+# Punctuation and whitespace runs, collapsed when comparing titles for duplicates
+NON_WORD_RE = re.compile(r'\W+')
+
+# When a headline matches several sections, the earliest one wins
+CATEGORY_PRIORITY = ('vatican', 'america', 'faith', 'culture', 'world', 'education')
+
+# HTTP settings shared by every feed request
+FETCH_HEADERS = {'User-Agent': 'ReadyCatholic/1.0', 'Accept-Encoding': 'gzip, deflate'}
+FETCH_TIMEOUT_TOTAL = 15
+FETCH_TIMEOUT_CONNECT = 5
+FETCH_TIMEOUT_READ = 10
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 0.3
+
+# Timezone used for the page date
+EST = ZoneInfo("America/New_York")
+
+# Per-feed ETag / Last-Modified validators and last parsed entries
+FEED_CACHE_FILE = 'feed_cache.json'
+
+def _load_cache():
+    """
+    Load the feed cache from disk, starting fresh if it is missing or unreadable.
+    """
+    try:
+        with open(FEED_CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache):
+    """
+    Write the feed cache atomically so an interrupted run can't corrupt it.
+    Entries for feeds no longer in CATHOLIC_NEWS_SOURCES are dropped.
+    """
+    current_urls = set(CATHOLIC_NEWS_SOURCES.values())
+    cache = {url: entry for url, entry in cache.items() if url in current_urls}
+    tmp_path = FEED_CACHE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, FEED_CACHE_FILE)
+
+async def _fetch_bytes(session, url, cached, max_per_source):
+    """
+    Download the raw body of a single feed, using a conditional GET when
+    cached entries were saved with the same max_per_source.
+    Returns (body, etag, modified, response_headers); body is None if the
+    feed is unchanged. response_headers carries the final URL and
+    Content-Type so feedparser can resolve relative links and charsets.
+    """
+    headers = {}
+    if cached.get('entries') and cached.get('max_per_source') == max_per_source:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('modified'):
+            headers['If-Modified-Since'] = cached['modified']
+    
+    # Retry only connection failures and timeouts, backing off between attempts
+    for attempt in range(FETCH_RETRIES + 1):
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    return None, cached.get('etag'), cached.get('modified'), None
+                response.raise_for_status()
+                body = await response.read()
+                response_headers = {'content-location': str(response.url)}
+                if response.headers.get('Content-Type'):
+                    response_headers['content-type'] = response.headers['Content-Type']
+                return body, response.headers.get('ETag'), response.headers.get('Last-Modified'), response_headers
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == FETCH_RETRIES:
+                raise
+            await asyncio.sleep(FETCH_BACKOFF * 2 ** attempt)
+
+def _parse_entries(body, response_headers, max_per_source):
+    """
+    Parse a downloaded feed into (title, link) pairs.
+    Runs in a worker process, so only plain tuples are sent back.
+    """
+    feed = feedparser.parse(body, response_headers=response_headers)
+    return [
+        (entry.get('title', 'No title'), entry.get('link', '#'))
+        for entry in feed.entries[:max_per_source]
+    ]
+
+async def _parse_in_pool(pool, response, max_per_source):
+    """
+    Hand a fetched body to the process pool.
+    Returns None if the feed was unchanged since the last run.
+    """
+    if isinstance(response, Exception):
+        raise response
+    body, _, _, response_headers = response
+    if body is None:
+        return None
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, _parse_entries, body, response_headers, max_per_source)
+
+async def _fetch_all(cache, max_per_source):
+    """
+    Download every feed concurrently over one pooled session, then parse
+    the bodies across CPU cores.
+    Returns (responses, entries) lists in source order; failed items hold
+    the exception instead.
+    """
+    connector = aiohttp.TCPConnector(limit=20, limit_per_host=4, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(
+        total=FETCH_TIMEOUT_TOTAL, connect=FETCH_TIMEOUT_CONNECT, sock_read=FETCH_TIMEOUT_READ
+    )
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=FETCH_HEADERS) as session:
+        responses = await asyncio.gather(
+            *[_fetch_bytes(session, url, cache.get(url, {}), max_per_source) for url in CATHOLIC_NEWS_SOURCES.values()],
+            return_exceptions=True,
+        )
+    
+    # Parsing is CPU-bound, so keep it off the event loop and the GIL
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        entries = await asyncio.gather(
+            *[_parse_in_pool(pool, response, max_per_source) for response in responses],
+            return_exceptions=True,
+        )
+    
+    return responses, entries
+
+def _classify(source_name, index, title):
+    """
+    Pick the section for a headline from its source, position and title.
+    """
+    if index == 0 and source_name in BREAKING_SOURCES:
+        return 'breaking'
+    
+    if title.isupper():
+        title = title.lower()
+    
+    matched = {match.lastgroup for match in KEYWORD_RE.finditer(title)}
+    if source_name in SOURCE_CATEGORY:
+        matched.add(SOURCE_CATEGORY[source_name])
+    
+    for category in CATEGORY_PRIORITY:
+        if category in matched:
+            return category
+    return 'faith'
+
 def fetch_headlines(max_per_source=3):
     """
     Fetch headlines from all Catholic news sources.
@@ -52,81 +238,75 @@ def fetch_headlines(max_per_source=3):
     
     print("Fetching headlines for ReadyCatholic...")
     
-    for source_name, feed_url in CATHOLIC_NEWS_SOURCES.items():
-        try:
-            print(f"  Fetching from {source_name}...")
-            feed = feedparser.parse(feed_url)
-            
-            if not feed.entries:
-                print(f"    Warning: No entries found for {source_name}")
-                continue
-                
-            for i, entry in enumerate(feed.entries[:max_per_source]):
-                headline = {
-                    'title': escape(entry.get('title', 'No title')),
-                    'link': entry.get('link', '#'),
-                    'source': source_name,
+    cache = _load_cache()
+    responses, parsed = asyncio.run(_fetch_all(cache, max_per_source))
+    
+    # Collect (source, position, title, link) first; classification runs afterwards
+    raw = []
+    for (source_name, feed_url), response, entries in zip(CATHOLIC_NEWS_SOURCES.items(), responses, parsed):
+        if isinstance(entries, Exception):
+            print(f"  Error fetching from {source_name}: {str(entries)}")
+            continue
+        
+        if entries is None:
+            print(f"  {source_name} unchanged, using cached headlines")
+            entries = cache[feed_url]['entries']
+        else:
+            print(f"  Fetched {source_name}")
+            if entries:
+                _, etag, modified, _ = response
+                cache[feed_url] = {
+                    'etag': etag,
+                    'modified': modified,
+                    'max_per_source': max_per_source,
+                    'entries': entries,
                 }
-                
-                title_lower = entry.get('title', '').lower()
-                
-                if i == 0 and source_name in ['Vatican News', 'The Pillar', 'OSV News']:
-                    headlines['breaking'].append(headline)
-                elif 'pope' in title_lower or 'vatican' in title_lower or source_name == 'Vatican News':
-                    headlines['vatican'].append(headline)
-                elif source_name in ['National Catholic Register', 'OSV News', 'The Pillar'] or 'us' in title_lower:
-                    headlines['america'].append(headline)
-                elif source_name in ['Catholic Daily Reflections', 'Catholic Stand', 'Spirit Daily'] or 'faith' in title_lower:
-                    headlines['faith'].append(headline)
-                elif source_name in ['LifeSiteNews', 'TFP.org', 'ChurchPOP'] or 'life' in title_lower or 'culture' in title_lower:
-                    headlines['culture'].append(headline)
-                elif source_name in ['Crux', 'Zenit', 'The Catholic Herald'] or 'world' in title_lower:
-                    headlines['world'].append(headline)
-                elif source_name == 'Catholic Education' or 'school' in title_lower or 'education' in title_lower:
-                    headlines['education'].append(headline)
-                else:
-                    headlines['faith'].append(headline)
-                    
-        except Exception as e:
-            print(f"  Error fetching from {source_name}: {str(e)}")
+        
+        if not entries:
+            print(f"    Warning: No entries found for {source_name}")
+            continue
+        
+        raw.extend((source_name, i, title, link) for i, (title, link) in enumerate(entries))
     
-    for category in headlines:
-        limit = 15 if category != 'breaking' else 5
-        headlines[category] = headlines[category][:limit]
+    _save_cache(cache)
     
-    return headlines
-
-def generate_html(headlines):
-    """
-    Generate the HTML file with branded ReadyCatholic content.
-    """
-    # 1. SET TIMEZONE TO EST AND FORMAT DATE
-    now_est = datetime.now(ZoneInfo("America/New_York"))
-    date_string = now_est.strftime('%A, %B %d, %Y')
+    # Syndicated stories show up under several sources; keep the first copy.
+    # Breaking candidates go first so a reprint elsewhere can't push them
+    # out of TOP STORIES; the sort is stable, so source order is kept otherwise.
+    raw.sort(key=lambda row: not (row[1] == 0 and row[0] in BREAKING_SOURCES))
+    seen = set()
+    full = set()
+    for source_name, i, title_raw, link in raw:
+        if len(full) == len(headlines):
+            break
+        
+        # Empty and placeholder titles aren't real stories, so never treat them as copies
+        title_norm = NON_WORD_RE.sub(' ', title_raw.lower()).strip()[:80]
+        key = hash(title_norm) if title_norm and title_norm != 'no title' else None
+        if key is not None and key in seen:
+            continue
+        
+        category = _classify(source_name, i, title_raw)
+        if category in full:
+            continue
+        
+        headlines[category].append({
+            'title': escape(title_raw),
+            'link': link,
+            'source': source_name,
+        })
+        if key is not None:
+            seen.add(key)
+        
+        # Only the first story of each breaking source can land in TOP STORIES
+        limit = 15 if category != 'breaking' else min(5, len(BREAKING_SOURCES))
+        if len(headlines[category]) >= limit:
+            full.add(category)
     
-    def format_items(items):
-        html = ""
-        for item in items:
-            html += f'''
-                <div class="news-item">
-                    <a href="{item['link']}" target="_blank">{item['title']}</a>
-                    <div class="source">{item['source']}</div>
-                </div>
-            '''
-        return html
-
-    def format_featured(items):
-        html = ""
-        for item in items:
-            html += f'''
-                <div class="featured-item">
-                    <a href="{item['link']}" target="_blank">{item['title']}</a>
-                    <div class="source">{item['source']}</div>
-                </div>
-            '''
-        return html
+    return headlines
 
-    html_template = f'''<!DOCTYPE html>
+# Page layout; CSS braces are doubled for str.format
+HTML_TEMPLATE = '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -167,32 +347,32 @@ def generate_html(headlines):
 
         <div class="featured-section">
             <h2>⚡ TOP STORIES</h2>
-            {format_featured(headlines['breaking'])}
+            {top_stories}
         </div>
 
         <div class="main-content">
             <div class="column">
                 <div class="section-header">VATICAN & POPE</div>
-                {format_items(headlines['vatican'])}
+                {vatican}
                 
                 <div class="section-header">CHURCH IN AMERICA</div>
-                {format_items(headlines['america'])}
+                {america}
             </div>
 
             <div class="column">
                 <div class="section-header">FAITH & SPIRITUALITY</div>
-                {format_items(headlines['faith'])}
+                {faith}
                 
                 <div class="section-header">CULTURE & LIFE</div>
-                {format_items(headlines['culture'])}
+                {culture}
             </div>
 
             <div class="column">
                 <div class="section-header">WORLD CHURCH</div>
-                {format_items(headlines['world'])}
+                {world}
                 
                 <div class="section-header">EDUCATION & YOUTH</div>
-                {format_items(headlines['education'])}
+                {education}
             </div>
         </div>
 
@@ -207,7 +387,36 @@ def generate_html(headlines):
 </body>
 </html>
 '''
-    return html_template
+
+def _format_items(items, css_class='news-item'):
+    """
+    Render a list of headlines as HTML blocks.
+    """
+    return "".join(f'''
+                <div class="{css_class}">
+                    <a href="{item['link']}" target="_blank">{item['title']}</a>
+                    <div class="source">{item['source']}</div>
+                </div>
+            ''' for item in items)
+
+def generate_html(headlines):
+    """
+    Generate the HTML file with branded ReadyCatholic content.
+    """
+    # 1. SET TIMEZONE TO EST AND FORMAT DATE
+    now_est = datetime.now(EST)
+    date_string = now_est.strftime('%A, %B %d, %Y')
+    
+    return HTML_TEMPLATE.format(
+        date_string=date_string,
+        top_stories=_format_items(headlines['breaking'], 'featured-item'),
+        vatican=_format_items(headlines['vatican']),
+        america=_format_items(headlines['america']),
+        faith=_format_items(headlines['faith']),
+        culture=_format_items(headlines['culture']),
+        world=_format_items(headlines['world']),
+        education=_format_items(headlines['education']),
+    )
 
 def main():
     try: